@@ -27,3 +27,41 @@ def rescale_and_clip(data, scale, offset, vmin, vmax):
 def numba_take(lut, data):
     # numba supports only the 1st two arguments of np.take
     return np.take(lut, data)
+
+@numba.jit(nopython=True)
+def boxplot_stats(data, want_outliers):
+    # data should be 1d float64, whiskers are decided by 1.5 IQR
+    # returns (p25, median, p75, lower, upper, min, max, outlier indices)
+    # outlier indices are empty if want_outliers is False
+    n = data.shape[0]
+    qpos = np.array([0.25, 0.5, 0.75]) * (n - 1)
+    lo = np.floor(qpos).astype(np.int64)
+    hi = np.ceil(qpos).astype(np.int64)
+    part = np.partition(data, np.unique(np.concatenate((lo, hi))))
+    q = part[lo] + (part[hi] - part[lo]) * (qpos - lo)
+    p25, median, p75 = q[0], q[1], q[2]
+    upper_theory = p75 + 1.5 * (p75 - p25)
+    lower_theory = p25 - 1.5 * (p75 - p25)
+
+    lower, upper = np.inf, -np.inf
+    dmin, dmax = np.inf, -np.inf
+    for x in data:
+        dmin = min(dmin, x)
+        dmax = max(dmax, x)
+        if x <= upper_theory:
+            upper = max(upper, x)
+        if x >= lower_theory:
+            lower = min(lower, x)
+
+    if not want_outliers:
+        return p25, median, p75, lower, upper, dmin, dmax, np.empty(0, dtype=np.int64)
+
+    # outliers are collected in a second pass, since they
+    # can only be decided after whiskers are known
+    idx = np.empty(n, dtype=np.int64)
+    count = 0
+    for i in range(n):
+        if data[i] < lower or data[i] > upper:
+            idx[count] = i
+            count += 1
+    return p25, median, p75, lower, upper, dmin, dmax, idx[:count]
@@ -1,8 +1,10 @@
 import numpy as np
 
-from ..Qt import QtGui
+from .. import Qt
+from ..Qt import QtCore, QtGui
 from ..Qt.QtCore import QPointF, QRectF
 from .. import functions as fn
+from ..util.numba_helper import getNumbaFunctions
 from .GraphicsObject import GraphicsObject
 from .ScatterPlotItem import Symbols
 
@@ -12,20 +14,95 @@ __all__ = ['BoxplotItem']
 DEFAULT_BOX_WIDTH = 0.8
 DEFAULT_SYM_SIZE  = 10
 
+# shared by all items that have nothing to draw, created on first use
+_EMPTY_PICTURE = None
+
+def _emptyPicture():
+    global _EMPTY_PICTURE
+    if _EMPTY_PICTURE is None:
+        _EMPTY_PICTURE = QtGui.QPicture()
+    return _EMPTY_PICTURE
+
+
+def _quantiles(data, q, axis=None):
+    '''
+    same as `np.percentile(data, 100*q, axis)` with linear interpolation,
+    but uses a single `np.partition` (O(N)) instead of a full sort
+    '''
+    data = np.asarray(data)
+    if axis is None:
+        data, axis = data.ravel(), 0
+    pos = (data.shape[axis] - 1) * np.asarray(q, dtype=float)
+    lo = np.floor(pos).astype(np.intp)
+    hi = np.ceil(pos).astype(np.intp)
+    part = np.partition(data, np.unique(np.concatenate((lo, hi))), axis=axis)
+    # quantiles go to the first axis, as np.percentile does.
+    # interpolate in floating point, integer differences can overflow
+    dtype = data.dtype if np.issubdtype(data.dtype, np.inexact) else np.float64
+    plo = np.moveaxis(np.take(part, lo, axis=axis), axis, 0).astype(dtype)
+    phi = np.moveaxis(np.take(part, hi, axis=axis), axis, 0).astype(dtype)
+    frac = (pos - lo).reshape((-1,) + (1,) * (plo.ndim - 1))
+    return plo + (phi - plo) * frac
+
+
+def _triple_quantile(data, axis=None):
+    '''
+    returns (25th percentile, median, 75th percentile) of data
+    '''
+    return _quantiles(data, [0.25, 0.5, 0.75], axis=axis)
+
+
+def _lowestHighest(dtype):
+    '''
+    lowest and highest values of dtype, used as initial values of masked reductions
+    '''
+    if np.issubdtype(dtype, np.integer):
+        info = np.iinfo(dtype)
+        return info.min, info.max
+    return -np.inf, np.inf
+
+
 def IQR_1p5(data):
     '''
     use 1.5IQR to get whisker boundaries
     returns (lower whisker, upper whisker)
     '''
     data = np.asarray(data)
-    p75, p25 = np.percentile(data, [75, 25])
+    p25, p75 = _quantiles(data, [0.25, 0.75])
     upper_theory = p75 + 1.5 * (p75 - p25)
     lower_theory = p25 - 1.5 * (p75 - p25)
-    upper = np.max(data[data<=upper_theory])
-    lower = np.min(data[data>=lower_theory])
+    # masked reductions without allocating the selected subsets,
+    # neither subset is empty, so the initial values never show up
+    lowest, highest = _lowestHighest(data.dtype)
+    upper = data.max(initial=lowest, where=data<=upper_theory)
+    lower = data.min(initial=highest, where=data>=lower_theory)
     return lower, upper
 
 
+def _IQR_1p5_rows(data, p25, p75):
+    '''
+    row-wise `IQR_1p5` of a 2d array, using precomputed quartiles of each row
+    returns (array of lower whiskers, array of upper whiskers)
+    '''
+    upper_theory = p75 + 1.5 * (p75 - p25)
+    lower_theory = p25 - 1.5 * (p75 - p25)
+    lowest, highest = _lowestHighest(data.dtype)
+    upper = data.max(axis=1, initial=lowest, where=data<=upper_theory[:, None])
+    lower = data.min(axis=1, initial=highest, where=data>=lower_theory[:, None])
+    return lower, upper
+
+
+def _outlierMask(data, lower, upper, out=None, tmp=None):
+    '''
+    boolean mask of values outside of [lower, upper], `out` and `tmp` are
+    optional preallocated bool arrays to avoid allocating temporaries.
+    this still takes three passes (two comparisons and an OR)
+    '''
+    mask = np.less(data, lower, out=out)
+    mask |= np.greater(data, upper, out=tmp)
+    return mask
+
+
 def validateWhiskerFunc(func):
     valid = False
     isNumber = lambda n: isinstance(n, (int, float, np.number))
@@ -58,6 +135,10 @@ class BoxplotItem(GraphicsObject):
             symbolPen=None,
             symbolBrush=None
         )
+        # preallocated buffers of box primitives, reused by every generatePicture
+        self._whiskerArray = Qt.internals.PrimitiveArray(QtCore.QLineF, 4)
+        self._boxArray = Qt.internals.PrimitiveArray(QtCore.QRectF, 4)
+        self._medianArray = Qt.internals.PrimitiveArray(QtCore.QLineF, 4)
         self.setWhiskerFunc(IQR_1p5)
         self.setData(**opts)
     
@@ -109,12 +190,18 @@ class BoxplotItem(GraphicsObject):
         self._symbolPen = fn.mkPen(self.opts["symbolPen"])
         self._symbolBrush = fn.mkBrush(self.opts["symbolBrush"])
         
+        # pick the box geometry routine of current orientation once,
+        # they are static methods so this doesn't create a reference cycle
+        self._boxGeometry = self._geometryLocAsX if self.opts["locAsX"] else self._geometryLocAsY
+
         self._dataBoundRect = None
         self._penWidth = self._pen.widthF() if self._pen.isCosmetic() else 0
         self._symbolSize = self.opts["symbolSize"] or DEFAULT_SYM_SIZE
 
         self.picture = None
-        self.outlierData = {}
+        # style changes only need a new picture, keep the box statistics
+        if not opts.keys().isdisjoint(("data", "loc", "outlier")):
+            self._stats = None
         self.prepareGeometryChange()
         self.informViewBoundsChanged()
     
@@ -127,72 +214,197 @@ class BoxplotItem(GraphicsObject):
         if validateWhiskerFunc(func):
             self.whiskerFunc = func
             self.picture = None
-            self.outlierData = {}
+            self._stats = None
+            self._dataBoundRect = None
+            self.prepareGeometryChange()
+            self.informViewBoundsChanged()
         else:
             print(f"{func} is not a valid whisker function")
     
-    def generatePicture(self):
-        self.picture = QtGui.QPicture()
-        
+    def _computeStats(self):
+        '''
+        Compute box statistics of every dataset and cache them in `self._stats`,
+        the cache is reused until data or whisker function is changed.
+
+        `self._stats` is a dict of 1d arrays (one element per box) with keys
+        `pos`, `p25`, `median`, `p75`, `lower`, `upper`, `min` and `max`,
+        plus `outliers`, a list with the outlier array of every box, or an empty
+        list when outliers are disabled. It is empty if there is no data.
+        `min` and `max` are the extremes of the drawn values: the data extremes
+        when outliers are enabled, the whiskers otherwise.
+        '''
+        if self._stats is not None:
+            return self._stats
+
+        self._stats = {}
         loc, data = self.opts["loc"], self.opts["data"]
         # data should be a 2d numpy array or a list of array-like
         if data is None or \
-           not (isinstance(data, np.ndarray) or isinstance(data, list)):
-            return
+           not (isinstance(data, np.ndarray) or isinstance(data, list)) or \
+           len(data) == 0:
+            return self._stats
         # loc decides where to draw boxes, it should be the same size as data
         if isinstance(loc, list) or isinstance(loc, np.ndarray):
             if len(loc) != len(data):
                 raise ValueError(f"len of `loc` ({len(loc)}) and `data` ({len(data)}) should be the same")
+            loc = np.asarray(loc)
         else:
             loc = np.arange(len(data))
-        
-        locAsX = self.opts["locAsX"]
+
+        if isinstance(data, np.ndarray) and data.ndim == 2:
+            # every dataset has the same length, process all of them at once
+            p25, median, p75 = _triple_quantile(data, axis=1)
+            if self.whiskerFunc is IQR_1p5:
+                lower, upper = _IQR_1p5_rows(data, p25, p75)
+            else:
+                lower, upper = np.array([self.whiskerFunc(dataset) for dataset in data]).T
+            if self.opts["outlier"]:
+                dmin, dmax = data.min(axis=1), data.max(axis=1)
+                mask = _outlierMask(data, lower[:, None], upper[:, None])
+                # outliers are sparse, integer indexing is cheaper than boolean
+                rows, cols = np.nonzero(mask)
+                counts = np.bincount(rows, minlength=len(data))
+                outliers = np.split(data[rows, cols], np.cumsum(counts)[:-1])
+            else:
+                dmin, dmax = lower, upper
+                outliers = []
+        else:
+            # numba kernel computes all stats of a dataset in one go,
+            # but it only knows about the default 1.5IQR whiskers.
+            # it is slower than the vectorized path above for 2d arrays
+            fn_numba = getNumbaFunctions() if self.whiskerFunc is IQR_1p5 else None
+            n = len(data)
+            p25, median, p75, lower, upper, dmin, dmax = np.empty((7, n))
+            outliers = []
+            # scratch buffers for outlier masks, shared by all datasets
+            # and released once the stats are built
+            maskBuf = tmpBuf = np.empty(0, dtype=bool)
+            # rows of a numeric ndarray are already ndarray views
+            if isinstance(data, np.ndarray) and data.dtype != object:
+                rows = data
+            else:
+                rows = map(np.asarray, data)
+            for i, dataset in enumerate(rows):
+                if fn_numba is not None:
+                    (p25[i], median[i], p75[i], lower[i], upper[i],
+                     dmin[i], dmax[i], idx) = fn_numba.boxplot_stats(
+                        np.ascontiguousarray(dataset, dtype=np.float64),
+                        self.opts["outlier"])
+                    if self.opts["outlier"]:
+                        outliers.append(dataset.take(idx))
+                    else:
+                        dmin[i], dmax[i] = lower[i], upper[i]
+                else:
+                    p25[i], median[i], p75[i] = _triple_quantile(dataset)
+                    lower[i], upper[i] = self.whiskerFunc(dataset)
+                    # get outlier data points if enabled
+                    if self.opts["outlier"]:
+                        dmin[i], dmax[i] = np.min(dataset), np.max(dataset)
+                        size = len(dataset)
+                        if len(maskBuf) < size:
+                            maskBuf = np.empty(size, dtype=bool)
+                            tmpBuf = np.empty(size, dtype=bool)
+                        mask = _outlierMask(dataset, lower[i], upper[i],
+                                            out=maskBuf[:size], tmp=tmpBuf[:size])
+                        outliers.append(dataset.take(np.flatnonzero(mask)))
+                    else:
+                        dmin[i], dmax[i] = lower[i], upper[i]
+
+        self._stats = dict(
+            pos=loc,
+            p25=p25,
+            median=median,
+            p75=p75,
+            lower=lower,
+            upper=upper,
+            min=dmin,
+            max=dmax,
+            outliers=outliers
+        )
+        return self._stats
+
+    def generatePicture(self):
+        stats = self._computeStats()
         width = self.opts["width"]
+        # box width to 0 means hide box lines
+        if not stats or width == 0:
+            self.picture = _emptyPicture()
+            return
         
+        n = len(stats["pos"])
+        self._whiskerArray.resize(4 * n)
+        self._boxArray.resize(n)
+        self._medianArray.resize(n)
+        self._boxGeometry(stats, width,
+                          self._whiskerArray.ndarray().reshape(n, 4, 4),
+                          self._boxArray.ndarray(),
+                          self._medianArray.ndarray())
+        
+        # draw every kind of primitive in a single call,
+        # grouped by pen and brush, and skip invisible ones
+        noPen = self._pen.style() == QtCore.Qt.PenStyle.NoPen
+        noBrush = self._brush.style() == QtCore.Qt.BrushStyle.NoBrush
+        noMedianPen = self._medianPen.style() == QtCore.Qt.PenStyle.NoPen
+        self.picture = QtGui.QPicture()
         p = QtGui.QPainter(self.picture)
-        for pos, dataset in zip(loc, data):
-            dataset = np.asarray(dataset)
-            p75, median, p25 = np.percentile(dataset, [75, 50, 25])
-            lower, upper = self.whiskerFunc(dataset)
-            # get outlier data points if enabled
-            if self.opts["outlier"]:
-                mask = np.logical_or(dataset<lower, dataset>upper)
-                self.outlierData[pos] = dataset[mask]
-            
-            # box width to 0 means hide box lines
-            if width == 0:
-                continue
-            
-            p.setPen(self._pen)
-            # whiskers
-            if locAsX:
-                p.drawLine(QPointF(pos-width/4, upper), QPointF(pos+width/4, upper))
-                p.drawLine(QPointF(pos-width/4, lower), QPointF(pos+width/4, lower))
-                p.drawLine(QPointF(pos, upper), QPointF(pos, p75))
-                p.drawLine(QPointF(pos, lower), QPointF(pos, p25))
-            else:
-                p.drawLine(QPointF(upper, pos-width/4), QPointF(upper, pos+width/4))
-                p.drawLine(QPointF(lower, pos-width/4), QPointF(lower, pos+width/4))
-                p.drawLine(QPointF(upper, pos), QPointF(p75, pos))
-                p.drawLine(QPointF(lower, pos), QPointF(p25, pos))
-            # box
+        p.setPen(self._pen)
+        if not noPen:
+            p.drawLines(*self._whiskerArray.drawargs())
+        if not (noPen and noBrush):
             p.setBrush(self._brush)
-            if locAsX:
-                p.drawRect(QRectF(pos-width/2, p25, width, p75-p25))
-            else:
-                p.drawRect(QRectF(p25, pos-width/2, p75-p25, width))
-            # median
+            p.drawRects(*self._boxArray.drawargs())
+        if not noMedianPen:
             p.setPen(self._medianPen)
-            if locAsX:
-                p.drawLine(QPointF(pos-width/2, median), QPointF(pos+width/2, median))
-            else:
-                p.drawLine(QPointF(median, pos-width/2), QPointF(median, pos+width/2))
+            p.drawLines(*self._medianArray.drawargs())
         p.end()
+
+    @staticmethod
+    def _geometryLocAsX(stats, width, whiskers, boxes, medians):
+        '''
+        fill whisker lines (n, 4, 4), box rects (n, 4) and
+        median lines (n, 4) of vertical boxes in place
+        '''
+        pos, p25, median, p75, lower, upper = (
+            stats[k] for k in ("pos", "p25", "median", "p75", "lower", "upper"))
+        w2, w4 = width/2, width/4
+        whiskers[:] = np.array([
+            [pos-w4, upper, pos+w4, upper],
+            [pos-w4, lower, pos+w4, lower],
+            [pos, upper, pos, p75],
+            [pos, lower, pos, p25]
+        ]).transpose(2, 0, 1)
+        boxes[:, 0] = pos - w2
+        boxes[:, 1] = p25
+        boxes[:, 2] = width
+        boxes[:, 3] = p75 - p25
+        medians[:] = np.array([pos-w2, median, pos+w2, median]).T
+
+    @staticmethod
+    def _geometryLocAsY(stats, width, whiskers, boxes, medians):
+        '''
+        fill whisker lines (n, 4, 4), box rects (n, 4) and
+        median lines (n, 4) of horizontal boxes in place
+        '''
+        pos, p25, median, p75, lower, upper = (
+            stats[k] for k in ("pos", "p25", "median", "p75", "lower", "upper"))
+        w2, w4 = width/2, width/4
+        whiskers[:] = np.array([
+            [upper, pos-w4, upper, pos+w4],
+            [lower, pos-w4, lower, pos+w4],
+            [upper, pos, p75, pos],
+            [lower, pos, p25, pos]
+        ]).transpose(2, 0, 1)
+        boxes[:, 0] = p25
+        boxes[:, 1] = pos - w2
+        boxes[:, 2] = p75 - p25
+        boxes[:, 3] = width
+        medians[:] = np.array([median, pos-w2, median, pos+w2]).T
             
     def paint(self, p, *args):
         if self.picture is None:
             self.generatePicture()
-        p.drawPicture(0, 0, self.picture)
+        if self.picture is not _EMPTY_PICTURE:
+            p.drawPicture(0, 0, self.picture)
 
         if not self.opts["outlier"]:
             return
@@ -206,21 +418,32 @@ class BoxplotItem(GraphicsObject):
         else:
             symbol = Symbols["o"]
         
+        stats = self._computeStats()
+        if not stats:
+            return
+        counts = [len(o) for o in stats["outliers"]]
+        if sum(counts) == 0:
+            return
+        vals = np.concatenate(stats["outliers"])
+        locs = np.repeat(stats["pos"], counts)
+        coords = np.vstack((locs, vals) if self.opts["locAsX"] else (vals, locs))
+        
+        # symbols are drawn in device coordinates, map all points at once and
+        # set a single transform per symbol. every symbol is still drawn on
+        # its own to keep the stacking of overlapping fills and outlines
+        tr = p.transform()
+        coords = fn.transformCoordinates(tr, coords)
+        size = self._symbolSize
+        
         p.setPen(self._symbolPen)
         p.setBrush(self._symbolBrush)
-        tr = p.transform()
-        for pos, outliers in self.outlierData.items():
-            for o in outliers:
-                x, y = (pos, o) if self.opts["locAsX"] else (o, pos)
-                p.resetTransform()
-                p.translate(*tr.map(x, y))
-                p.scale(self._symbolSize, self._symbolSize)                
-                p.drawPath(symbol)
+        for x, y in coords.T.tolist():
+            p.setTransform(QtGui.QTransform(size, 0, 0, size, x, y))
+            p.drawPath(symbol)
+        p.setTransform(tr)
                     
     def boundingRect(self):
-        xmn, xmx = self.dataBounds(ax=0)
-        ymn, ymx = self.dataBounds(ax=1)
-        rect = QRectF(xmn, ymn, xmx-xmn, ymx-ymn)
+        rect = self._getDataBoundRect()
         
         px = py = 0
         pxPad = self.pixelPadding()
@@ -238,27 +461,13 @@ class BoxplotItem(GraphicsObject):
         return rect
 
     def calculateDataBounds(self):
-        loc, data = self.opts["loc"], self.opts["data"]
-        if data is None:
+        # bounds only need the numbers, not the picture
+        stats = self._computeStats()
+        if not stats:
             return QRectF()
 
-        lst_lower = []
-        lst_upper = []
-        for dataset in data:
-            dataset = np.asarray(dataset)
-            if self.opts["outlier"]:
-                lower, upper = np.min(dataset), np.max(dataset)
-            else:
-                lower, upper = self.whiskerFunc(dataset)
-            lst_lower.append(lower)
-            lst_upper.append(upper)
-        miny = np.min(lst_lower)
-        maxy = np.max(lst_upper)
-
-        if loc is None:
-            loc = np.arange(len(data))
-        loc = np.array(loc)
-        minx, maxx = np.min(loc), np.max(loc)
+        miny, maxy = stats["min"].min(), stats["max"].max()
+        minx, maxx = np.min(stats["pos"]), np.max(stats["pos"])
         width = self.opts["width"]
         minx -= width/2
         maxx += width/2
@@ -266,16 +475,24 @@ class BoxplotItem(GraphicsObject):
         if not self.opts["locAsX"]:
             minx, maxx, miny, maxy = miny, maxy, minx, maxx
 
-        return QRectF(QPointF(minx, miny), QPointF(maxx, maxy))
+        # width of non-cosmetic pen is in data coordinates
+        rect = QRectF(QPointF(minx, miny), QPointF(maxx, maxy))
+        if self._pen.style() != QtCore.Qt.PenStyle.NoPen and not self._pen.isCosmetic():
+            pw = 0.5 * self._pen.widthF()
+            rect.adjust(-pw, -pw, pw, pw)
+        return rect
 
-    def dataBounds(self, ax, frac=1.0, orthoRange=None):
+    def _getDataBoundRect(self):
         if self._dataBoundRect is None:
             self._dataBoundRect = self.calculateDataBounds()
-            
+        return self._dataBoundRect
+
+    def dataBounds(self, ax, frac=1.0, orthoRange=None):
+        rect = self._getDataBoundRect()
         if ax == 0:
-            return [self._dataBoundRect.left(), self._dataBoundRect.right()]
+            return [rect.left(), rect.right()]
         else:
-            return [self._dataBoundRect.top(), self._dataBoundRect.bottom()]
+            return [rect.top(), rect.bottom()]
 
     def pixelPadding(self):
         symPadding = 0.7072 * self._symbolSize if self.opts["outlier"] else 0
@@ -0,0 +1,234 @@
+import numpy as np
+import pytest
+
+import pyqtgraph as pg
+from pyqtgraph.Qt import QtCore, QtGui
+from pyqtgraph.graphicsItems.BoxplotItem import IQR_1p5, _quantiles, _triple_quantile
+
+app = pg.mkQApp()
+
+
+def test_quantiles():
+    rng = np.random.default_rng(0)
+    for n in [1, 2, 3, 4, 5, 10, 101, 1000]:
+        for dataset in [rng.normal(size=n), rng.integers(0, 10, n)]:
+            expected = np.percentile(dataset, [25, 50, 75])
+            assert np.allclose(_quantiles(dataset, [0.25, 0.5, 0.75]), expected)
+            assert np.allclose(_triple_quantile(dataset), expected)
+
+    # differences of narrow integers must not overflow,
+    # compare with float input since np.percentile itself can overflow here
+    for dtype in [np.int8, np.int16, np.uint8]:
+        info = np.iinfo(dtype)
+        for n in [4, 5, 101]:
+            dataset = rng.integers(info.min, info.max, n, endpoint=True, dtype=dtype)
+            dataset[:2] = info.min, info.max
+            expected = np.percentile(dataset.astype(float), [25, 50, 75])
+            assert np.allclose(_triple_quantile(dataset), expected)
+    dataset = np.array([-100, -90, 90, 100], dtype=np.int8)
+    assert np.allclose(_triple_quantile(dataset), [-92.5, 0, 92.5])
+    data = np.array([[-20000, -19000, 19000, 20000]], dtype=np.int16)
+    for d in [data, list(data)]:
+        assert pg.BoxplotItem(data=d)._computeStats()["median"][0] == 0
+
+    data = rng.normal(size=(5, 101))
+    expected = np.percentile(data, [25, 50, 75], axis=1)
+    assert np.allclose(_triple_quantile(data, axis=1), expected)
+    assert np.allclose(_triple_quantile(data.T, axis=0), expected)
+
+
+def test_IQR_1p5():
+    dataset = np.array([-50, 1, 2, 3, 4, 5, 6, 7, 8, 50])
+    assert IQR_1p5(dataset) == (1, 8)
+    assert IQR_1p5([1, 2, 3]) == (1, 3)
+    assert IQR_1p5(dataset.astype(np.int16)) == (1, 8)
+    assert IQR_1p5(dataset.astype(np.float32)) == (1, 8)
+
+
+def test_BoxplotItem_stats():
+    np.random.seed(8)
+    data = [np.random.normal(500, 30, 1000) for _ in range(3)]
+    bp = pg.BoxplotItem(data=data)
+
+    stats = bp._computeStats()
+    assert len(stats["pos"]) == len(data)
+    for i, dataset in enumerate(data):
+        p25, median, p75 = np.percentile(dataset, [25, 50, 75])
+        lower, upper = IQR_1p5(dataset)
+        assert np.isclose(stats["p25"][i], p25)
+        assert np.isclose(stats["median"][i], median)
+        assert np.isclose(stats["p75"][i], p75)
+        assert stats["lower"][i] == lower
+        assert stats["upper"][i] == upper
+        expected = dataset[(dataset < lower) | (dataset > upper)]
+        assert np.array_equal(np.sort(stats["outliers"][i]), np.sort(expected))
+
+    # stats are cached until data or whisker function changes
+    assert bp._computeStats() is stats
+    bp.setData(pen='r', brush='b', width=0.5, locAsX=False)
+    assert bp._computeStats() is stats
+    bp.setData(data=data)
+    assert bp._computeStats() is not stats
+    bp.setWhiskerFunc(lambda d: (min(d), max(d)))
+    stats = bp._computeStats()
+    assert all(len(o) == 0 for o in stats["outliers"])
+
+    # no outlier arrays are kept when outliers are disabled
+    for d in [data, np.array(data)]:
+        assert pg.BoxplotItem(data=d, outlier=False)._computeStats()["outliers"] == []
+
+
+def test_BoxplotItem_stats_2d():
+    np.random.seed(8)
+    data = np.random.normal(500, 30, (4, 1000))
+    bp2d = pg.BoxplotItem(data=data)
+    bplist = pg.BoxplotItem(data=[list(dataset) for dataset in data])
+    for whiskerFunc in [IQR_1p5, lambda d: (min(d), max(d))]:
+        bp2d.setWhiskerFunc(whiskerFunc)
+        bplist.setWhiskerFunc(whiskerFunc)
+        stats2d = bp2d._computeStats()
+        statslist = bplist._computeStats()
+        for key in ["pos", "p25", "median", "p75", "lower", "upper", "min", "max"]:
+            assert np.allclose(stats2d[key], statslist[key])
+        for o2d, olist in zip(stats2d["outliers"], statslist["outliers"]):
+            assert np.array_equal(o2d, olist)
+
+
+def test_BoxplotItem_stats_numba():
+    pytest.importorskip("numba")
+    np.random.seed(8)
+    ragged = [np.random.normal(500, 30, n) for n in [1, 2, 3, 1000, 1001]]
+    for data, outlier in [(ragged, True), (ragged, False)]:
+        expected = pg.BoxplotItem(data=data, outlier=outlier)._computeStats()
+        pg.setConfigOption("useNumba", True)
+        try:
+            stats = pg.BoxplotItem(data=data, outlier=outlier)._computeStats()
+        finally:
+            pg.setConfigOption("useNumba", False)
+        for key in ["pos", "p25", "median", "p75", "lower", "upper", "min", "max"]:
+            assert np.allclose(stats[key], expected[key])
+        for o, oexp in zip(stats["outliers"], expected["outliers"]):
+            assert np.array_equal(o, oexp)
+
+
+def test_BoxplotItem_stats_numba_2d(monkeypatch):
+    # 2d arrays always take the vectorized numpy path, it beats the kernel there
+    numba_functions = pytest.importorskip("pyqtgraph.functions_numba")
+
+    def boxplot_stats(data, want_outliers):
+        raise AssertionError("numba kernel used for 2d data")
+
+    monkeypatch.setattr(numba_functions, "boxplot_stats", boxplot_stats)
+    np.random.seed(8)
+    data = np.random.normal(500, 30, (4, 1000))
+    pg.setConfigOption("useNumba", True)
+    try:
+        stats = pg.BoxplotItem(data=data)._computeStats()
+        with pytest.raises(AssertionError):
+            pg.BoxplotItem(data=list(data))._computeStats()
+    finally:
+        pg.setConfigOption("useNumba", False)
+    assert len(stats["pos"]) == len(data)
+
+
+def test_BoxplotItem_bounds():
+    data = np.array([[1, 2, 3, 4, 100], [2, 3, 4, 5, 6]], dtype=float)
+    bp = pg.BoxplotItem(data=data, loc=[1, 3], width=1)
+
+    assert bp.dataBounds(ax=0) == [0.5, 3.5]
+    assert bp.dataBounds(ax=1) == [1, 100]
+
+    # without outliers, bounds are decided by whiskers
+    bp.setData(outlier=False)
+    assert bp.dataBounds(ax=1) == [1, 6]
+
+    # bounds are computed from the statistics only, without drawing the boxes
+    bp.boundingRect()
+    bp.pixelPadding()
+    assert bp.picture is None
+
+    bp.setData(locAsX=False)
+    assert bp.dataBounds(ax=0) == [1, 6]
+    assert bp.dataBounds(ax=1) == [0.5, 3.5]
+
+    # non-cosmetic pen width is in data coordinates
+    pen = pg.mkPen('y', width=0.5, cosmetic=False)
+    bp.setData(pen=pen)
+    assert bp.dataBounds(ax=0) == [0.75, 6.25]
+    assert bp.dataBounds(ax=1) == [0.25, 3.75]
+
+
+def test_BoxplotItem_geometry():
+    # quartiles (2, 3, 4) and (4, 6, 8), whiskers (1, 5) and (2, 10)
+    data = np.array([[1, 2, 3, 4, 5], [2, 4, 6, 8, 10]], dtype=float)
+    whiskers = np.array([
+        [-0.25, 5, 0.25, 5], [-0.25, 1, 0.25, 1], [0, 5, 0, 4], [0, 1, 0, 2],
+        [1.75, 10, 2.25, 10], [1.75, 2, 2.25, 2], [2, 10, 2, 8], [2, 2, 2, 4],
+    ])
+    boxes = np.array([[-0.5, 2, 1, 2], [1.5, 4, 1, 4]])
+    medians = np.array([[-0.5, 3, 0.5, 3], [1.5, 6, 2.5, 6]])
+
+    bp = pg.BoxplotItem(data=data, loc=[0, 2], width=1)
+    bp.generatePicture()
+    assert np.array_equal(bp._whiskerArray.ndarray(), whiskers)
+    assert np.array_equal(bp._boxArray.ndarray(), boxes)
+    assert np.array_equal(bp._medianArray.ndarray(), medians)
+
+    # horizontal boxes swap x and y of every primitive
+    bp.setData(locAsX=False)
+    bp.generatePicture()
+    assert np.array_equal(bp._whiskerArray.ndarray(), whiskers[:, [1, 0, 3, 2]])
+    assert np.array_equal(bp._boxArray.ndarray(), boxes[:, [1, 0, 3, 2]])
+    assert np.array_equal(bp._medianArray.ndarray(), medians[:, [1, 0, 3, 2]])
+
+
+def test_BoxplotItem_paint():
+    np.random.seed(8)
+    data = [np.random.normal(500, 30, 1000) for _ in range(5)]
+    plot = pg.PlotWidget()
+    plot.show()
+    for opts in [{}, dict(locAsX=False, symbol="star"), dict(outlier=False)]:
+        bp = pg.BoxplotItem(data=data, **opts)
+        plot.addItem(bp)
+        app.processEvents()
+        assert bp.picture is not None
+        plot.removeItem(bp)
+
+    # empty data shouldn't break painting
+    bp = pg.BoxplotItem()
+    plot.addItem(bp)
+    app.processEvents()
+    assert bp.picture is not None and bp.picture.isNull()
+    assert bp.dataBounds(ax=0) == [0, 0]
+    assert bp.dataBounds(ax=1) == [0, 0]
+    plot.close()
+
+
+def renderOutliers(outliers, **opts):
+    # paint a box whose outliers are `outliers` onto a transparent image,
+    # data point (0, 100) is mapped to pixel (50, 50)
+    data = [np.concatenate([np.arange(1, 9), outliers])]
+    bp = pg.BoxplotItem(data=data, pen=None, medianPen=None, **opts)
+    img = QtGui.QImage(100, 100, QtGui.QImage.Format.Format_ARGB32)
+    img.fill(QtCore.Qt.GlobalColor.transparent)
+    p = QtGui.QPainter(img)
+    p.translate(50, -50)
+    bp.paint(p)
+    p.end()
+    return pg.functions.ndarray_from_qimage(img).copy()
+
+
+def test_BoxplotItem_outlier_stacking():
+    # overlapping symbols are filled, not cancelled out
+    img = renderOutliers([100, 100.5], symbolBrush='w')
+    assert tuple(img[50, 50]) == (255, 255, 255, 255)
+
+    # translucent fills of overlapping symbols build up
+    single = renderOutliers([100], symbolBrush=(255, 0, 0, 128))
+    double = renderOutliers([100, 100], symbolBrush=(255, 0, 0, 128))
+    assert double[50, 50, 3] > single[50, 50, 3]
+
+    # later symbols are drawn over the outline of earlier ones
+    img = renderOutliers([100, 104], symbolBrush='w', symbolPen='r')
+    stacked = renderOutliers([104], symbolBrush='w', symbolPen='r')
+    assert np.array_equal(img[52:58, 45:55], stacked[52:58, 45:55])